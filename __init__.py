@@ -1 +1,3 @@
-from .drawutils import *
\ No newline at end of file
+from .drawutils import *
+from .replay import PlotRecorder, load_replay, replay_plot
+from .aio import AsyncRenderer, render
@@ -0,0 +1,216 @@
+import re
+import time
+import asyncio
+import weakref
+import importlib
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+# "module:function" specs, anything else given as a string is a replay file
+_func_spec = re.compile(r'^[\w.]+:\w+$')
+
+
+#===================================================================================================
+def _init_worker(style):
+    import ROOT
+    from . import drawutils
+    ROOT.gROOT.SetBatch(True)
+    if style is not None:
+        drawutils.use_style(style)
+    return
+
+def _run_job(spec, output, return_bytes, kwargs):
+    start = time.perf_counter()
+    if callable(spec):
+        spec(output, **kwargs)
+    elif _func_spec.match(spec):
+        module, func = spec.split(':')
+        getattr(importlib.import_module(module), func)(output, **kwargs)
+    else:
+        from .replay import replay_plot
+        replay_plot(spec, output=output, **kwargs)
+
+    result = output
+    if return_bytes:
+        with open(output, 'rb') as f:
+            result = f.read()
+    return result, time.perf_counter() - start
+
+def _release(loop, slots):
+    # jobs dropped by `close` can finish after asyncio.run() closed their loop
+    if loop.is_closed():
+        return
+    try:
+        loop.call_soon_threadsafe(slots.release)
+    except RuntimeError:
+        pass
+    return
+#===================================================================================================
+
+#===================================================================================================
+class AsyncRenderer:
+    """Run drawutils plots from asyncio code without blocking the event loop
+
+    All the ROOT work (drawing and SaveAs) happens in a dedicated worker process, in batch mode,
+    so jobs are executed one after the other in submission order. PyROOT keeps the GIL during
+    C++ calls, which is why a thread would not do. Jobs are therefore described by picklable
+    specs: a replay file, a "module:function" string or a module-level function.
+
+    At most `max_queue` jobs per event loop can be pending at a time: further calls to `render`
+    wait for a free slot, which gives backpressure to the callers. Cancelling a `render` call
+    drops the job if it has not been handed to the worker yet; otherwise the job is completed
+    and its result discarded. If the worker dies, or after `close`, a new worker process is
+    started with the next job.
+
+    Args:
+        max_queue (int, optional): maximum number of pending jobs per event loop. Defaults to 32.
+        style (str, optional): registered drawutils style applied in the worker. Defaults to 'atlas'.
+        window (int, optional): number of recent jobs used for the latency metrics.
+            Defaults to 1000.
+    """
+
+    def __init__(self, max_queue=32, style='atlas', window=1000):
+        self.max_queue = max_queue
+        self.style     = style
+        self._executor = None
+        self._slots    = weakref.WeakKeyDictionary()
+        self._lock     = threading.Lock()
+
+        self._pending   = 0
+        self._counts    = {'submitted': 0, 'completed': 0, 'failed': 0, 'cancelled': 0}
+        self._wait_time = deque(maxlen=window)
+        self._run_time  = deque(maxlen=window)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=1,
+                                                     mp_context=multiprocessing.get_context('spawn'),
+                                                     initializer=_init_worker, initargs=(self.style,))
+            return self._executor
+
+    async def render(self, spec, output, return_bytes=False, **kwargs):
+        """Render a plot in the worker process
+
+        Args:
+            spec (str or function): path of a replay file (without extension), in which case kwargs
+                are passed to `replay_plot` (e.g. overrides), or plotting function given as
+                "module:function" or as a module-level function, called as spec(output, **kwargs).
+                The function must draw the plot and save it to `output`.
+            output (str): output path
+            return_bytes (bool, optional): return the content of the output file instead of its
+                path. Defaults to False.
+
+        Returns:
+            str or bytes: output path, or content of the output file
+        """
+        loop  = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.Semaphore(self.max_queue)
+
+        await slots.acquire()
+        with self._lock:
+            self._pending += 1
+            self._counts['submitted'] += 1
+
+        submitted = time.perf_counter()
+        try:
+            executor = self._get_executor()
+            cfuture  = executor.submit(_run_job, spec, output, return_bytes, kwargs)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+                self._counts['failed'] += 1
+            slots.release()
+            raise
+
+        # the slot is released when the job really finishes (or is dropped before starting),
+        # not when the awaiting coroutine is cancelled
+        cfuture.add_done_callback(lambda f: self._job_done(f, executor, submitted))
+        cfuture.add_done_callback(lambda _: _release(loop, slots))
+        result, _ = await asyncio.wrap_future(cfuture)
+        return result
+
+    def _job_done(self, cfuture, executor, submitted):
+        total = time.perf_counter() - submitted
+        with self._lock:
+            self._pending -= 1
+            if cfuture.cancelled():
+                self._counts['cancelled'] += 1
+                return
+            if cfuture.exception() is not None:
+                self._counts['failed'] += 1
+                # a late callback of an executor that was already replaced must not drop the new one
+                if isinstance(cfuture.exception(), BrokenProcessPool) and self._executor is executor:
+                    self._executor = None
+                return
+            self._counts['completed'] += 1
+            run_time = cfuture.result()[1]
+            self._wait_time.append(total - run_time)
+            self._run_time.append(run_time)
+        return
+
+    def metrics(self):
+        """Get queue depth, job counters and latencies (in seconds) of the recent jobs
+
+        Returns:
+            dict: metrics
+        """
+        with self._lock:
+            wait_time = np.array(self._wait_time)
+            run_time  = np.array(self._run_time)
+            metrics   = {'queue_depth': self._pending, **self._counts}
+
+        for name, values in (('wait', wait_time), ('run', run_time), ('latency', wait_time+run_time)):
+            if values.size:
+                metrics[f'{name}_mean'] = float(values.mean())
+                metrics[f'{name}_p95']  = float(np.percentile(values, 95))
+                metrics[f'{name}_max']  = float(values.max())
+        return metrics
+
+    def close(self, wait=True):
+        """Stop the worker process, dropping the jobs that have not started
+
+        The renderer can still be used afterwards: the next job starts a new worker.
+
+        Args:
+            wait (bool, optional): wait for the running job to finish. Defaults to True.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+        return
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+        return False
+#===================================================================================================
+
+#===================================================================================================
+_default_renderer = None
+
+def get_renderer():
+    """Get the shared renderer used by `render`, with the ATLAS style
+
+    Returns:
+        AsyncRenderer: shared renderer
+    """
+    global _default_renderer
+    if _default_renderer is None:
+        _default_renderer = AsyncRenderer()
+    return _default_renderer
+
+async def render(spec, output, return_bytes=False, **kwargs):
+    """Render a plot on the shared renderer. See `AsyncRenderer.render`"""
+    return await get_renderer().render(spec, output, return_bytes, **kwargs)
+#===================================================================================================
@@ -0,0 +1,354 @@
+"""Warm render daemon: a pool of pre-forked workers that already imported ROOT and drawutils
+
+Start the server (it imports ROOT, so it is fine to go through the package):
+
+    python -m drawutils.daemon serve --workers 4 --max-jobs 200
+
+Submit jobs with the client, which only needs the standard library. Run this file directly so
+that the package (and hence ROOT) is not imported:
+
+    python /path/to/drawutils/daemon.py submit \\
+        --replay plots/mass --output plots/mass_red.png --overrides '{"set_style": {"color": "red"}}'
+    python /path/to/drawutils/daemon.py submit --func mypkg.plots:draw_mass --kwargs '{"output": "m.png"}'
+
+The daemon runs any function it is sent, so its socket is only accessible to the user running
+it. By default it lives in $XDG_RUNTIME_DIR, or in the temporary directory with the user id in
+its name.
+"""
+import os
+import gc
+import sys
+import json
+import time
+import stat
+import signal
+import socket
+import argparse
+import tempfile
+import importlib
+import traceback
+
+default_socket = os.path.join(os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir(),
+                              f'drawutils-{os.getuid()}.sock')
+
+
+#===================================================================================================
+def _import_package():
+    # works both as drawutils.daemon and when the file is run directly
+    return importlib.import_module(__package__ or 'drawutils')
+
+def _recv_line(conn):
+    chunks = []
+    while True:
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if chunk.endswith(b'\n'):
+            break
+    return b''.join(chunks)
+
+def _bind_socket(path, backlog):
+    # refuse to take the socket of a running daemon, but replace the one left by a dead daemon
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        pass
+    else:
+        if not stat.S_ISSOCK(mode):
+            raise FileExistsError(f'{path} exists and is not a socket')
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(path)
+            except ConnectionRefusedError:
+                os.unlink(path)
+            else:
+                raise RuntimeError(f'A daemon is already listening on {path}')
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # no group or other permissions, so the socket is never open to them, even before the chmod
+    umask = os.umask(0o177)
+    try:
+        sock.bind(path)
+    except OSError:
+        sock.close()
+        raise
+    finally:
+        os.umask(umask)
+    os.chmod(path, 0o600)
+    sock.listen(backlog)
+    return sock
+#===================================================================================================
+
+#===================================================================================================
+class RenderDaemon:
+    """Pre-forked pool of warm plotting workers listening on a Unix socket
+
+    The master process imports ROOT and drawutils (and the `preload` modules), applies the style
+    and then forks the workers, which all accept jobs on the same socket. After each job the
+    ROOT state of the worker is cleaned (canvases, open files, in-memory objects and style), and
+    a worker exits after `max_jobs` jobs, being replaced by a fresh fork of the master. Only
+    the canvases, files and gROOT objects created during the job are deleted: objects that
+    already existed when the job started, e.g. created by the `preload` modules, are kept.
+
+    Workers that fail within `min_lifetime` seconds of being forked are replaced with an
+    exponential backoff, and the daemon stops after `max_failures` such failures in a row.
+
+    A job is a JSON object, either {"replay": path, "output": path, "overrides": {...}} to render
+    a replay file, or {"func": "module:function", "args": [...], "kwargs": {...}} to call a
+    plotting function. The answer has a "status" ("ok" or "error"), the "output" of the job (the
+    list of files written for a replay, the return value of the function otherwise), the
+    "elapsed" time and the "pid" of the worker.
+
+    Args:
+        socket_path (str, optional): path of the Unix socket, created with permissions 0600.
+            Defaults to `default_socket`.
+        workers (int, optional): number of workers. Defaults to 4.
+        max_jobs (int, optional): number of jobs after which a worker is replaced. Defaults to 100.
+        style (str, optional): registered drawutils style applied to every job. Defaults to 'atlas'.
+        preload (list, optional): modules imported by the master before forking. Defaults to ().
+        min_lifetime (float, optional): seconds under which a failing worker counts as an
+            immediate failure. Defaults to 1.
+        max_failures (int, optional): immediate failures in a row after which the daemon stops.
+            Defaults to 10.
+        timeout (float, optional): seconds a worker waits for a client to send its job or read
+            the answer. Defaults to 30.
+    """
+
+    def __init__(self, socket_path=default_socket, workers=4, max_jobs=100, style='atlas', preload=(),
+                 min_lifetime=1., max_failures=10, timeout=30.):
+        self.socket_path  = socket_path
+        self.workers      = workers
+        self.max_jobs     = max_jobs
+        self.style        = style
+        self.preload      = preload
+        self.min_lifetime = min_lifetime
+        self.max_failures = max_failures
+        self.timeout      = timeout
+        self._children    = {}
+        self._sock        = None
+
+    def serve(self):
+        """Warm up, fork the workers and keep the pool full until SIGTERM or SIGINT
+
+        Returns:
+            int: 0 when stopped by a signal, 1 when workers kept failing immediately
+        """
+        import ROOT
+        self._ROOT = ROOT
+        self._pkg  = _import_package()
+        ROOT.gROOT.SetBatch(True)
+        self._pkg.use_style(self.style)
+        for module in self.preload:
+            importlib.import_module(module)
+
+        self._sock = _bind_socket(self.socket_path, max(128, 4*self.workers))
+
+        def stop(signum, frame):
+            raise KeyboardInterrupt
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        code     = 0
+        failures = 0
+        try:
+            for _ in range(self.workers):
+                self._spawn()
+            while True:
+                pid, status = os.wait()
+                if pid not in self._children:
+                    continue
+                lifetime = time.monotonic() - self._children.pop(pid)
+
+                if os.waitstatus_to_exitcode(status) != 0 and lifetime < self.min_lifetime:
+                    failures += 1
+                    if failures >= self.max_failures:
+                        print(f'{failures} workers failed right after starting, stopping', file=sys.stderr)
+                        code = 1
+                        break
+                    time.sleep(min(0.1 * 2**failures, 10.))
+                else:
+                    failures = 0
+                self._spawn()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for pid in self._children:
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+            for pid in self._children:
+                try:
+                    os.waitpid(pid, 0)
+                except ChildProcessError:
+                    pass
+            self._sock.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+        return code
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            code = 0
+            try:
+                self._worker_loop()
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        self._children[pid] = time.monotonic()
+        return
+
+    def _worker_loop(self):
+        for _ in range(self.max_jobs):
+            conn, _ = self._sock.accept()
+            # a client that never sends its job must not block the worker
+            conn.settimeout(self.timeout)
+            with conn:
+                self._handle(conn)
+        return
+
+    def _handle(self, conn):
+        start  = time.perf_counter()
+        before = self._snapshot()
+        try:
+            try:
+                line = _recv_line(conn)
+            except socket.timeout:
+                raise TimeoutError(f'No job received within {self.timeout} s') from None
+            job = json.loads(line)
+            response = {'status': 'ok', 'output': self._run(job)}
+        except Exception as e:
+            response = {
+                'status'   : 'error',
+                'error'    : f'{type(e).__name__}: {e}',
+                'traceback': traceback.format_exc(),
+            }
+        finally:
+            self._reset(before)
+
+        response['elapsed'] = time.perf_counter() - start
+        response['pid']     = os.getpid()
+        try:
+            conn.sendall(json.dumps(response).encode() + b'\n')
+        except OSError:
+            pass
+        return
+
+    def _run(self, job):
+        if 'replay' in job:
+            _, outputs = self._pkg.replay_plot(job['replay'], job.get('overrides'), job.get('output'))
+            return outputs
+
+        module, func = job['func'].split(':')
+        result = getattr(importlib.import_module(module), func)(*job.get('args', []), **job.get('kwargs', {}))
+        if isinstance(result, (str, int, float, bool, list, dict)) or result is None:
+            return result
+        return str(result)
+
+    def _root_lists(self):
+        ROOT = self._ROOT
+        return {
+            'canvases': ROOT.gROOT.GetListOfCanvases(),
+            'files'   : ROOT.gROOT.GetListOfFiles(),
+            'objects' : ROOT.gROOT.GetList(),
+        }
+
+    def _snapshot(self):
+        addressof = self._ROOT.addressof
+        return {kind: {addressof(obj) for obj in objs} for kind, objs in self._root_lists().items()}
+
+    def _reset(self, before):
+        ROOT = self._ROOT
+        # objects only referenced from Python cycles delete themselves before the C++ cleanup
+        gc.collect()
+        for kind, objs in self._root_lists().items():
+            created = [obj for obj in objs if ROOT.addressof(obj) not in before[kind]]
+            for obj in created:
+                if kind == 'files':
+                    obj.Close()
+                objs.Remove(obj)
+                # hand the object to Python, which deletes it when `created` goes away
+                ROOT.SetOwnership(obj, True)
+            del created
+        ROOT.gROOT.cd()
+        self._pkg.use_style(self.style)
+        return
+#===================================================================================================
+
+#===================================================================================================
+def submit(job, socket_path=default_socket, timeout=None):
+    """Send a job to the daemon and wait for the answer
+
+    Args:
+        job (dict): job description, see `RenderDaemon`
+        socket_path (str, optional): path of the Unix socket. Defaults to `default_socket`.
+        timeout (float, optional): timeout in seconds. Defaults to None.
+
+    Returns:
+        dict: answer of the worker
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(job).encode() + b'\n')
+        answer = _recv_line(sock)
+    if not answer:
+        raise ConnectionError('The worker closed the connection without answering')
+    return json.loads(answer)
+#===================================================================================================
+
+#===================================================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Warm drawutils render daemon')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser('serve', help='start the daemon')
+    serve_parser.add_argument('--socket', default=default_socket, help='path of the Unix socket')
+    serve_parser.add_argument('--workers', type=int, default=4, help='number of workers')
+    serve_parser.add_argument('--max-jobs', type=int, default=100, help='jobs after which a worker is replaced')
+    serve_parser.add_argument('--style', default='atlas', help='registered drawutils style')
+    serve_parser.add_argument('--preload', action='append', default=[], help='module to import before forking')
+    serve_parser.add_argument('--timeout', type=float, default=30., help='seconds to wait for a client')
+
+    submit_parser = commands.add_parser('submit', help='send a job to the daemon')
+    submit_parser.add_argument('--socket', default=default_socket, help='path of the Unix socket')
+    submit_parser.add_argument('--timeout', type=float, default=None, help='timeout in seconds')
+    submit_parser.add_argument('--replay', help='replay file to render (without extension)')
+    submit_parser.add_argument('--output', help='output path of the replay')
+    submit_parser.add_argument('--overrides', type=json.loads, default=None, help='replay overrides (JSON)')
+    submit_parser.add_argument('--func', help='plotting function as module:function')
+    submit_parser.add_argument('--args', type=json.loads, default=[], help='positional arguments (JSON list)')
+    submit_parser.add_argument('--kwargs', type=json.loads, default={}, help='keyword arguments (JSON object)')
+    submit_parser.add_argument('--job', help='job file (JSON), or - to read it from stdin')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        return RenderDaemon(args.socket, args.workers, args.max_jobs, args.style, args.preload,
+                            timeout=args.timeout).serve()
+
+    if args.job:
+        job = json.load(sys.stdin) if args.job == '-' else json.load(open(args.job))
+    elif args.replay:
+        job = {'replay': args.replay, 'output': args.output, 'overrides': args.overrides}
+    elif args.func:
+        job = {'func': args.func, 'args': args.args, 'kwargs': args.kwargs}
+    else:
+        parser.error('submit needs --job, --replay or --func')
+
+    answer = submit(job, args.socket, args.timeout)
+    if answer['status'] != 'ok':
+        print(answer['traceback'], file=sys.stderr)
+        return 1
+    print(answer['output'])
+    return 0
+#===================================================================================================
+
+if __name__ == '__main__':
+    sys.exit(main())
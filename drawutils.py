@@ -1,4 +1,9 @@
+import csv
+import json
+from contextlib import contextmanager
+
 import ROOT
+import numpy as np
 from seaborn import color_palette
 
 leg_positions = {
@@ -556,6 +561,197 @@ def get_yrange(hists, get_min=False, get_max=False, lim_value=None, werror=False
             return mins[0]
 #===================================================================================================
 
+#===================================================================================================
+_array_dtypes = {
+    'TArrayD': np.float64,
+    'TArrayF': np.float32,
+    'TArrayI': np.int32,
+    'TArrayS': np.int16,
+}
+
+def hist_to_arrays(h):
+    """Get bin edges, contents and errors of a 1D histogram as numpy arrays
+
+    The underlying ROOT buffers are copied in one go when possible, so no per-bin
+    PyROOT call is made. Contents and errors include the underflow and overflow bins.
+
+    Args:
+        h (TH1): 1D histogram
+
+    Returns:
+        tuple: edges (nbins+1), contents (nbins+2) and errors (nbins+2)
+    """
+    if h.GetDimension() != 1:
+        raise ValueError(f'{h.GetName()} is a {h.GetDimension()}D histogram, only 1D histograms are supported')
+
+    ax     = h.GetXaxis()
+    nbins  = h.GetNbinsX()
+    ncells = nbins + 2
+
+    if ax.GetXbins().GetSize() > 0:
+        edges = _buffer_to_array(ax.GetXbins().GetArray(), nbins+1, np.float64)
+    else:
+        edges = np.linspace(ax.GetXmin(), ax.GetXmax(), nbins+1)
+
+    dtype = None
+    if not h.InheritsFrom('TProfile'):
+        for base, _dtype in _array_dtypes.items():
+            if h.InheritsFrom(base):
+                dtype = _dtype
+                break
+
+    if dtype is None:
+        # profiles, TH1C (Char_t buffer) and other classes: contents are read bin by bin
+        contents = np.array([h.GetBinContent(b) for b in range(ncells)], dtype=np.float64)
+        errors   = np.array([h.GetBinError(b) for b in range(ncells)], dtype=np.float64)
+        return edges, contents, errors
+
+    contents = _buffer_to_array(h.GetArray(), ncells, dtype).astype(np.float64)
+    if h.GetSumw2N() > 0:
+        errors = np.sqrt(_buffer_to_array(h.GetSumw2().GetArray(), ncells, np.float64))
+    else:
+        errors = np.sqrt(np.abs(contents))
+    return edges, contents, errors
+
+def _buffer_to_array(buf, size, dtype):
+    buf.reshape((size,))
+    return np.frombuffer(buf, dtype=dtype, count=size).copy()
+#===================================================================================================
+
+#===================================================================================================
+def get_syst_band(nominal, variations, method='quadrature', groups=None, sources=None, symmetric=False,
+                  stat=False):
+    """Build systematic uncertainty bands from variation histograms
+
+    All the variations are stacked into a single (variations x bins) array and combined at once.
+    Variations in the same correlated group are fully correlated: their signed differences with
+    the nominal are summed linearly in each bin. The up (down) shift of a group, or of a single
+    variation outside any group, is then its positive (negative) part, and the shifts are finally
+    combined across groups and sources.
+
+    The up and down variations of the same source are given as a pair in `sources`. In each bin,
+    the up (down) shift of the source is the largest positive (negative) shift of the two, so a
+    source whose variations move the same way in a bin is counted once. They must not be put
+    in the same group instead, as their shifts would cancel.
+
+    Args:
+        nominal (TH1): nominal histogram
+        variations (list, dict or numpy.ndarray): variation histograms, optionally by name, or array
+            of shape (variations, bins) with the variation contents (without under/overflow bins)
+        method (str, optional): 'quadrature' to sum the shifts in quadrature, 'envelope' to take
+            the largest shift. Defaults to 'quadrature'.
+        groups (dict or list, optional): correlated groups, each one a list of variation names
+            (when `variations` is a dict) or indices. Defaults to None.
+        sources (dict or list, optional): (up, down) pairs of variation names or indices. A
+            variation can only be in one group or source. Defaults to None.
+        symmetric (bool, optional): use the largest of the up and down uncertainties for both.
+            Defaults to False.
+        stat (bool, optional): add the statistical uncertainty of the nominal in quadrature.
+            Defaults to False.
+
+    Returns:
+        tuple: TGraphAsymmErrors around the nominal (upper pad) and around 1 (ratio pad)
+    """
+    edges, nom, nom_err = hist_to_arrays(nominal)
+    nom     = nom[1:-1]
+    nom_err = nom_err[1:-1]
+    nbins   = len(nom)
+
+    names = None
+    if isinstance(variations, dict):
+        names      = list(variations.keys())
+        variations = list(variations.values())
+
+    if isinstance(variations, np.ndarray):
+        if variations.ndim != 2 or variations.shape[1] != nbins:
+            raise ValueError(f'Variations must have shape (variations, {nbins}), got {variations.shape}')
+        shifts = variations.astype(np.float64) - nom
+    else:
+        shifts = np.empty((len(variations), nbins))
+        for ivar, h in enumerate(variations):
+            var_edges, contents, _ = hist_to_arrays(h)
+            if not np.array_equal(var_edges, edges):
+                raise ValueError(f'Variation {h.GetName()} does not have the binning of {nominal.GetName()}')
+            shifts[ivar] = contents[1:-1]
+        shifts -= nom
+
+    nvars = len(shifts)
+    used  = set()
+
+    def index(m):
+        if isinstance(m, str):
+            if names is None:
+                raise ValueError(f'Variation "{m}" given by name, but variations are not a dict')
+            if m not in names:
+                raise ValueError(f'Unknown variation "{m}" in groups or sources')
+            m = names.index(m)
+        elif isinstance(m, (bool, np.bool_)) or not isinstance(m, (int, np.integer)):
+            raise TypeError(f'Variation index must be an integer, got {m!r}')
+        elif not -nvars <= m < nvars:
+            raise ValueError(f'Variation index {m} out of range')
+        m = int(m) % nvars
+        if m in used:
+            raise ValueError(f'Variation {m} is in more than one group or source')
+        used.add(m)
+        return m
+
+    # correlated group of each variation, a group of its own outside any group
+    gid = np.arange(nvars)
+    if groups is not None and len(groups):
+        if isinstance(groups, dict):
+            groups = list(groups.values())
+        for igroup, members in enumerate(groups):
+            gid[[index(m) for m in members]] = nvars + igroup
+
+    pairs = []
+    if sources is not None and len(sources):
+        if isinstance(sources, dict):
+            sources = list(sources.values())
+        for pair in sources:
+            if len(pair) != 2:
+                raise ValueError(f'Sources must be (up, down) pairs, got {pair!r}')
+            pairs.append([index(m) for m in pair])
+
+    free = np.setdiff1d(np.arange(nvars), np.array(pairs, dtype=int))
+    if len(np.unique(gid[free])) < len(free):
+        # linear sum of the signed shifts of each group, as a (groups x variations) product
+        gid = np.unique(gid[free], return_inverse=True)[1]
+        membership = np.zeros((gid.max()+1, len(free)))
+        membership[gid, np.arange(len(free))] = 1.
+        grouped = membership @ shifts[free]
+    else:
+        grouped = shifts[free]
+    paired = shifts[np.array(pairs, dtype=int).reshape(-1, 2)]
+
+    up   = np.clip(np.concatenate([grouped, paired.max(axis=1)]), 0., None)
+    down = np.clip(-np.concatenate([grouped, paired.min(axis=1)]), 0., None)
+
+    if method == 'quadrature':
+        up   = np.sqrt(np.square(up).sum(axis=0))
+        down = np.sqrt(np.square(down).sum(axis=0))
+    elif method == 'envelope':
+        up   = up.max(axis=0, initial=0.)
+        down = down.max(axis=0, initial=0.)
+    else:
+        raise ValueError(f'Unknown method "{method}", use "quadrature" or "envelope"')
+
+    if symmetric:
+        up = down = np.maximum(up, down)
+    if stat:
+        up   = np.hypot(up, nom_err)
+        down = np.hypot(down, nom_err)
+
+    x  = 0.5 * (edges[1:] + edges[:-1])
+    ex = 0.5 * (edges[1:] - edges[:-1])
+
+    ratio_up   = np.divide(up  , nom, out=np.zeros(nbins), where=nom!=0)
+    ratio_down = np.divide(down, nom, out=np.zeros(nbins), where=nom!=0)
+
+    band       = ROOT.TGraphAsymmErrors(nbins, x, nom, ex, ex, down, up)
+    ratio_band = ROOT.TGraphAsymmErrors(nbins, x, np.ones(nbins), ex, ex, ratio_down, ratio_up)
+    return band, ratio_band
+#===================================================================================================
+
 #===================================================================================================
 def format_legend(size=0.035, legpos=None, xmin=0.50, xmax=0.9, ymin=0.7, ymax=0.9, ratio=False, ncols=1):
     if legpos:
@@ -651,83 +847,219 @@ def draw_grid_lines(h):
 #===================================================================================================
 
 #===================================================================================================
-def set_default_style():
-    ROOT.gStyle.SetPadTickX(1)
-    ROOT.gStyle.SetPadTickY(1)
-    ROOT.gStyle.SetFrameFillColor(0)
-    ROOT.gStyle.SetFrameBorderSize(0)
-    ROOT.gStyle.SetFrameBorderMode(0)
-    ROOT.gStyle.SetCanvasColor(0)
-    ROOT.gStyle.SetOptStat(0)
-    ROOT.gStyle.SetTitleBorderSize(0)
-    ROOT.gStyle.SetTitleFillColor(0)
-    ROOT.gStyle.SetTextFont(132)
-    ROOT.gStyle.SetLegendFont(132)
-    ROOT.gStyle.SetLabelFont(132, "XYZ")
-    ROOT.gStyle.SetTitleFont(132, "XYZ")
-    ROOT.gStyle.SetEndErrorSize(0)
-    ROOT.gStyle.SetPalette(71)
+def _build_default_style(style):
+    style.SetPadTickX(1)
+    style.SetPadTickY(1)
+    style.SetFrameFillColor(0)
+    style.SetFrameBorderSize(0)
+    style.SetFrameBorderMode(0)
+    style.SetCanvasColor(0)
+    style.SetOptStat(0)
+    style.SetTitleBorderSize(0)
+    style.SetTitleFillColor(0)
+    style.SetTextFont(132)
+    style.SetLegendFont(132)
+    style.SetLabelFont(132, "XYZ")
+    style.SetTitleFont(132, "XYZ")
+    style.SetEndErrorSize(0)
     return
 #===================================================================================================
 
 #===================================================================================================
-def set_atlas_style():
-    ROOT.gStyle.SetPalette(71)
-
+def _build_atlas_style(style):
     # use plain black on white colors
     icol = 0
-    ROOT.gStyle.SetFrameBorderMode(icol)
-    ROOT.gStyle.SetFrameFillColor(icol)
-    ROOT.gStyle.SetCanvasBorderMode(icol)
-    ROOT.gStyle.SetCanvasColor(icol)
-    ROOT.gStyle.SetPadBorderMode(icol)
-    ROOT.gStyle.SetPadColor(icol)
-    ROOT.gStyle.SetStatColor(icol)
+    style.SetFrameBorderMode(icol)
+    style.SetFrameFillColor(icol)
+    style.SetCanvasBorderMode(icol)
+    style.SetCanvasColor(icol)
+    style.SetPadBorderMode(icol)
+    style.SetPadColor(icol)
+    style.SetStatColor(icol)
 
     # set the paper & margin sizes
-    ROOT.gStyle.SetPaperSize(20,26)
+    style.SetPaperSize(20,26)
 
     # set margin sizes
-    ROOT.gStyle.SetPadTopMargin(0.05)
-    ROOT.gStyle.SetPadRightMargin(0.05)
-    ROOT.gStyle.SetPadBottomMargin(0.16)
-    ROOT.gStyle.SetPadLeftMargin(0.16)
+    style.SetPadTopMargin(0.05)
+    style.SetPadRightMargin(0.05)
+    style.SetPadBottomMargin(0.16)
+    style.SetPadLeftMargin(0.16)
 
     # set title offsets (for axis label)
-    ROOT.gStyle.SetTitleXOffset(1.4)
-    ROOT.gStyle.SetTitleYOffset(1.4)
+    style.SetTitleXOffset(1.4)
+    style.SetTitleYOffset(1.4)
 
     # use large fonts
     font = 42 # Helvetica
     tsize = 0.05
-    ROOT.gStyle.SetTextFont(font)
-    ROOT.gStyle.SetTextSize(tsize)
-
-    ROOT.gStyle.SetLabelFont(font, "x")
-    ROOT.gStyle.SetTitleFont(font, "x")
-    ROOT.gStyle.SetLabelFont(font, "y")
-    ROOT.gStyle.SetTitleFont(font, "y")
-    ROOT.gStyle.SetLabelFont(font, "z")
-    ROOT.gStyle.SetTitleFont(font, "z")
-
-    ROOT.gStyle.SetLabelSize(tsize, "x")
-    ROOT.gStyle.SetTitleSize(tsize, "x")
-    ROOT.gStyle.SetLabelSize(tsize, "y")
-    ROOT.gStyle.SetTitleSize(tsize, "y")
-    ROOT.gStyle.SetLabelSize(tsize, "z")
-    ROOT.gStyle.SetTitleSize(tsize, "z")
+    style.SetTextFont(font)
+    style.SetTextSize(tsize)
+
+    style.SetLabelFont(font, "x")
+    style.SetTitleFont(font, "x")
+    style.SetLabelFont(font, "y")
+    style.SetTitleFont(font, "y")
+    style.SetLabelFont(font, "z")
+    style.SetTitleFont(font, "z")
+
+    style.SetLabelSize(tsize, "x")
+    style.SetTitleSize(tsize, "x")
+    style.SetLabelSize(tsize, "y")
+    style.SetTitleSize(tsize, "y")
+    style.SetLabelSize(tsize, "z")
+    style.SetTitleSize(tsize, "z")
 
     # use bold lines and markers
-    ROOT.gStyle.SetMarkerStyle(20)
-    ROOT.gStyle.SetMarkerSize(1.2)
-    ROOT.gStyle.SetHistLineWidth(2)
-    ROOT.gStyle.SetLineStyleString(2, "[12 12]")
-    ROOT.gStyle.SetEndErrorSize(0.)
+    style.SetMarkerStyle(20)
+    style.SetMarkerSize(1.2)
+    style.SetHistLineWidth(2)
+    style.SetLineStyleString(2, "[12 12]")
+    style.SetEndErrorSize(0.)
 
     # do not display any of the standard histogram decorations
-    ROOT.gStyle.SetOptTitle(0)
-    ROOT.gStyle.SetOptStat(0)
-    ROOT.gStyle.SetOptFit(0)
+    style.SetOptTitle(0)
+    style.SetOptStat(0)
+    style.SetOptFit(0)
+    return
+#===================================================================================================
+
+#===================================================================================================
+_style_builders = {
+    'default': (None, _build_default_style, 71),
+    'atlas'  : (None, _build_atlas_style  , 71),
+}
+_styles        = {}
+_active_styles = {}
+
+def register_style(name, modifier, base='atlas', palette=None):
+    """Register a style variant derived from a registered style
+
+    The variant is built once, on first use, by applying the setter calls of `base` and then
+    `modifier` to a new TStyle. Registering an existing name replaces its definition and
+    rebuilds the templates of the styles derived from it; with `base` equal to `name`, the
+    modifier is applied on top of the current definition, e.g.
+    register_style('atlas', lambda style: style.SetOptStat(1), base='atlas'). The active style
+    picks the changes up at the next `use_style`.
+
+    Args:
+        name (str): name of the new style
+        modifier (function): function receiving the TStyle and calling the setters that differ
+            from `base`, e.g. lambda style: style.SetPadLeftMargin(0.2)
+        base (str, optional): name of the registered style to start from. Defaults to 'atlas'.
+        palette (int, optional): ROOT palette. Defaults to the palette of `base`.
+    """
+    if base not in _style_builders:
+        raise KeyError(f'Unknown style "{base}"')
+
+    if base == name:
+        base, previous, base_palette = _style_builders[name]
+        def builder(style):
+            previous(style)
+            modifier(style)
+    else:
+        if name in _style_bases(base):
+            raise ValueError(f'Style "{base}" is derived from "{name}"')
+        builder, base_palette = modifier, _style_builders[base][2]
+
+    _style_builders[name] = (base, builder, base_palette if palette is None else palette)
+    for other in _style_builders:
+        if other in _styles and name in _style_bases(other):
+            get_style(other, rebuild=True)
+    return
+
+def _style_bases(name):
+    # the style itself and all the styles it is derived from
+    bases = []
+    while name is not None:
+        bases.append(name)
+        name = _style_builders[name][0]
+    return bases
+
+def _apply_style_builders(style, name):
+    for base in reversed(_style_bases(name)):
+        _style_builders[base][1](style)
+    return
+
+def get_style(name, rebuild=False):
+    """Get the pristine TStyle of a registered style, building it the first time
+
+    This template is never made the current style: `use_style` copies it into the active
+    TStyle, so changes made through gStyle do not alter it.
+
+    Args:
+        name (str): name of the style
+        rebuild (bool, optional): apply all the setter calls again. Defaults to False.
+
+    Returns:
+        TStyle: template style, registered in gROOT with the name "drawutils_<name>_template"
+    """
+    if name not in _style_builders:
+        raise KeyError(f'Unknown style "{name}"')
+    style = _styles.get(name)
+    if style is None:
+        style = ROOT.TStyle(f'drawutils_{name}_template', name)
+        ROOT.SetOwnership(style, False)
+        _styles[name] = style
+        rebuild = True
+    if rebuild:
+        # start from ROOT's default style, which is what gStyle is before any set_*_style call
+        ROOT.gROOT.GetStyle('Modern').Copy(style)
+        style.SetName(f'drawutils_{name}_template')
+        style.SetTitle(name)
+        _apply_style_builders(style, name)
+    return style
+
+def use_style(name, rebuild=False):
+    """Make a registered style the current one, in the state defined by its setter calls
+
+    The pristine template of the style is copied into the active TStyle ("drawutils_<name>"),
+    which becomes gStyle, so changes made to gStyle since the last switch are discarded.
+
+    Args:
+        name (str): name of the style
+        rebuild (bool, optional): see `get_style`. Defaults to False.
+    """
+    template = get_style(name, rebuild)
+    style    = _active_styles.get(name)
+    if style is None:
+        style = ROOT.TStyle(f'drawutils_{name}', name)
+        ROOT.SetOwnership(style, False)
+        _active_styles[name] = style
+    template.Copy(style)
+    style.SetName(f'drawutils_{name}')
+    style.cd()
+    # the palette is global in ROOT, not part of the TStyle
+    ROOT.gStyle.SetPalette(_style_builders[name][2])
+    return
+
+@contextmanager
+def style_scope(name):
+    """Use a registered style inside a with block and restore the previous one afterwards
+
+    The previous gStyle object and the palette are restored as they were, whether or not the
+    previous style is a drawutils style. Entering a scope of the style that is already active
+    resets the changes made to it through gStyle.
+
+    Args:
+        name (str): name of the style
+    """
+    # gStyle itself is a reference to the global pointer, which use_style changes
+    previous = ROOT.BindObject(ROOT.addressof(ROOT.gStyle), 'TStyle')
+    palette  = ROOT.TArrayI(ROOT.TColor.GetPalette())
+    use_style(name)
+    try:
+        yield ROOT.gStyle
+    finally:
+        previous.cd()
+        ROOT.gStyle.SetPalette(palette.GetSize(), palette.GetArray())
+
+def set_default_style():
+    use_style('default')
+    return
+
+def set_atlas_style():
+    use_style('atlas')
     return
 #===================================================================================================
 
@@ -744,19 +1076,33 @@ def calc_size(pad):
 #===================================================================================================
 
 #===================================================================================================
-def draw_fitresult(xmin, xmax, ymin, ymax, props, size=0.02):
-    
-    pave = ROOT.TPaveText(xmin, ymin, xmax, ymax, "NDC NB")
-    pave.SetFillColorAlpha(ROOT.kWhite, 0.0)
-    pave.SetLineColorAlpha(ROOT.kWhite, 0.0)
-    pave.SetTextFont(42)
-    pave.SetTextColor(ROOT.kBlack)
-    pave.SetTextSize(size)
-    pave.SetTextAlign(11)
-    
+_fit_summary_fields = ('chi2', 'ndof', 'chi2_o_ndof', 'pvalue', 'nsig', 'nsigerr', 'nbkg', 'nbkgerr',
+                       'minnll', 'status')
+_fit_param_fields = ('name', 'value', 'error')
+
+def get_fit_summary(props):
+    """Extract the result of a fit into a structured summary
+
+    The parameters are stored in a numpy structured array (name, value, error), and the text
+    lines shown by `draw_fitresult` are formatted once and stored with them, so the summary can
+    be drawn, or exported with `export_fit_summaries`, without accessing the ROOT objects again.
+
+    Args:
+        props (dict, TF1 or RooFitResult): fit result. A dictionary can have chi2, ndof,
+            chi2_o_ndof, pvalue, nsig, nsigerr, nbkg, nbkgerr and variables (RooArgList).
+
+    Returns:
+        dict: fit quantities (None when not available), 'params' and 'lines'
+    """
+    summary = dict.fromkeys(_fit_summary_fields)
+    lines   = []
+
     if isinstance(props, dict):
-        lines = []
-        
+        summary['kind'] = 'dict'
+        for field in _fit_summary_fields:
+            if field in props:
+                summary[field] = props[field]
+
         if 'ndof' in props:
             lines.append('{:11s} = {:.2f} / {} = {:.3f}'.format('Chi2 / NDF', props['chi2'], props['ndof'], props['chi2_o_ndof']))
             lines.append('{:11s} = {}'.format('p-value', props['pvalue']))
@@ -771,45 +1117,111 @@ def draw_fitresult(xmin, xmax, ymin, ymax, props, size=0.02):
         if 'nbkg' in props and props['nbkg'] is not None:
             lines.append('{:11s} = {:.4f} #pm {:.5f}'.format('N_{bkg}', props['nbkg'], props['nbkgerr']))
 
+        params = _roo_params(props['variables']) if 'variables' in props else _fit_params([])
+        precision_from = 'error'
 
-        for propname, prop in props.items():
-            if propname == 'variables':
-                for ivar in range(prop.getSize()):
-                    par = prop.at(ivar)
-                    parname = par.getTitle().Data()
-                    parvalue = par.getVal()
-                    parerror = par.getError()
-
-                    if parerror < 0.01:
-                        precision = 4
-                    else:
-                        precision = 2
-                    this_line = f'{parname:10} = {parvalue:.{precision}f} +/- {parerror:.{precision}f}'
-                    lines.append(this_line)
-            
-
-        for this_line in lines:
-            pave.AddText(this_line)
-    
     elif props.InheritsFrom('TF1'):
-        chi2 = props.GetChisquare()
-        ndf  = props.GetNDF()
-        lines = []
-        lines.append('{:11s} = {:.2f} / {}'.format('Chi2 / NDF', chi2, ndf))
-        for ipar in range(props.GetNpar()):
-            parname  = props.GetParName(ipar)
-            parvalue = props.GetParameter(ipar)
-            parerror = props.GetParError(ipar)
-            if parvalue < 0.01:
-                precision = 4
-            else:
-                precision = 2            
-            this_line = f'{parname:10} = {parvalue:.{precision}f} +/- {parerror:.{precision}f}'
-            lines.append(this_line)
-        
-        for this_line in lines:
-            pave.AddText(this_line)
-   
-    
+        summary['kind'] = 'TF1'
+        npar   = props.GetNpar()
+        names  = [props.GetParName(ipar) for ipar in range(npar)]
+        params = _fit_params(names)
+        params['name']  = names
+        if npar:
+            params['value'] = _buffer_to_array(props.GetParameters(), npar, np.float64)
+            params['error'] = _buffer_to_array(props.GetParErrors(), npar, np.float64)
+
+        summary['chi2']   = props.GetChisquare()
+        summary['ndof']   = props.GetNDF()
+        summary['pvalue'] = props.GetProb()
+        if summary['ndof'] > 0:
+            summary['chi2_o_ndof'] = summary['chi2'] / summary['ndof']
+        lines.append('{:11s} = {:.2f} / {}'.format('Chi2 / NDF', summary['chi2'], summary['ndof']))
+        precision_from = 'value'
+
+    elif props.InheritsFrom('RooFitResult'):
+        summary['kind']   = 'RooFitResult'
+        summary['minnll'] = props.minNll()
+        summary['status'] = props.status()
+        lines.append('{:11s} = {:.2f}'.format('-log(L)', summary['minnll']))
+        params = _roo_params(props.floatParsFinal())
+        precision_from = 'error'
+
+    else:
+        raise TypeError(f'Cannot summarize fit result of class {props.ClassName()}')
+
+    for name, value, error in params.tolist():
+        precision = 4 if (error if precision_from == 'error' else value) < 0.01 else 2
+        lines.append(f'{name:10} = {value:.{precision}f} +/- {error:.{precision}f}')
+
+    summary['params'] = params
+    summary['lines']  = lines
+    return summary
+
+def _roo_params(arglist):
+    rows   = [(par.getTitle().Data(), par.getVal(), par.getError()) for par in arglist]
+    params = _fit_params([row[0] for row in rows])
+    params[:] = rows
+    return params
+
+def _fit_params(names):
+    # the name field fits the longest name, RooFit titles are often long LaTeX strings
+    width = max([len(name) for name in names] + [1])
+    return np.zeros(len(names), [('name', f'U{width}'), ('value', np.float64), ('error', np.float64)])
+#===================================================================================================
+
+#===================================================================================================
+def export_fit_summaries(summaries, path):
+    """Export fit summaries to a CSV (one row per parameter) or JSON file
+
+    Args:
+        summaries (dict): fit summaries (see `get_fit_summary`) by plot name
+        path (str): output file, the format is chosen from the extension (.csv or .json)
+    """
+    if path.endswith('.json'):
+        table = {}
+        for name, summary in summaries.items():
+            table[name] = {field: summary[field] for field in ('kind',) + _fit_summary_fields}
+            table[name]['params'] = [dict(zip(_fit_param_fields, par)) for par in summary['params'].tolist()]
+        with open(path, 'w') as f:
+            json.dump(table, f, indent=1, default=float)
+
+    elif path.endswith('.csv'):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(('plot', 'kind') + _fit_summary_fields + ('parameter', 'value', 'error'))
+            for name, summary in summaries.items():
+                common = [name, summary['kind']] + [summary[field] for field in _fit_summary_fields]
+                params = summary['params'].tolist() or [('', '', '')]
+                writer.writerows(common + list(par) for par in params)
+    else:
+        raise ValueError(f'Unknown format for {path}, use .csv or .json')
+    return
+#===================================================================================================
+
+#===================================================================================================
+def draw_fitresult(xmin, xmax, ymin, ymax, props, size=0.02):
+    """Draw the result of a fit in a TPaveText
+
+    Args:
+        xmin, xmax, ymin, ymax (float): position of the pave in NDC
+        props (dict, TF1 or RooFitResult): fit result, or summary from `get_fit_summary`
+        size (float, optional): text size. Defaults to 0.02.
+
+    Returns:
+        TPaveText: the pave
+    """
+    if not (isinstance(props, dict) and 'lines' in props):
+        props = get_fit_summary(props)
+
+    pave = ROOT.TPaveText(xmin, ymin, xmax, ymax, "NDC NB")
+    pave.SetFillColorAlpha(ROOT.kWhite, 0.0)
+    pave.SetLineColorAlpha(ROOT.kWhite, 0.0)
+    pave.SetTextFont(42)
+    pave.SetTextColor(ROOT.kBlack)
+    pave.SetTextSize(size)
+    pave.SetTextAlign(11)
+
+    for this_line in props['lines']:
+        pave.AddText(this_line)
     return pave
 #===================================================================================================
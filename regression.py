@@ -0,0 +1,221 @@
+import os
+import sys
+import glob
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+
+#===================================================================================================
+def fingerprint(path, size=64):
+    """Fingerprint an image with a difference hash and a downsampled greyscale copy
+
+    Args:
+        path (str): path of the image
+        size (int, optional): side of the downsampled image. Defaults to 64.
+
+    Returns:
+        tuple: 64-bit hash, downsampled image (size x size, uint8) and original (width, height)
+    """
+    with Image.open(path) as img:
+        shape = img.size
+        # greyscale first: reduce does not support every mode (e.g. palette PNGs)
+        img   = img.convert('L')
+        # cheap integer reduction, the bilinear resize then works on a small image
+        factor = min(shape) // (4*size)
+        if factor > 1:
+            img = img.reduce(factor)
+        thumb = img.resize((size, size), Image.BILINEAR)
+
+    # difference hash: sign of the horizontal gradient on a 9x8 image
+    small = np.asarray(thumb.resize((9, 8), Image.BILINEAR), dtype=np.int16)
+    bits  = np.packbits(small[:, 1:] > small[:, :-1])
+    return int.from_bytes(bits.tobytes(), 'big'), np.asarray(thumb, dtype=np.uint8), shape
+#===================================================================================================
+
+#===================================================================================================
+def _fingerprint_args(args):
+    return fingerprint(*args)
+
+def build_index(images, size=64, workers=None):
+    """Fingerprint a set of images in parallel
+
+    Args:
+        images (dict): image paths by plot name
+        size (int, optional): side of the downsampled images. Defaults to 64.
+        workers (int, optional): number of processes. Defaults to the number of CPUs.
+
+    Returns:
+        dict: names, hashes, thumbs and shapes as numpy arrays
+    """
+    names = sorted(images)
+    jobs  = [(images[name], size) for name in names]
+
+    if workers == 1 or len(jobs) < 2:
+        results = [_fingerprint_args(job) for job in jobs]
+    else:
+        workers = workers or os.cpu_count()
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(_fingerprint_args, jobs, chunksize=max(1, len(jobs)//(4*workers))))
+
+    return {
+        'names' : np.array(names, dtype=str),
+        'hashes': np.array([r[0] for r in results], dtype=np.uint64),
+        'thumbs': np.array([r[1] for r in results], dtype=np.uint8).reshape(len(names), size, size),
+        'shapes': np.array([r[2] for r in results], dtype=np.int32).reshape(len(names), 2),
+    }
+#===================================================================================================
+
+#===================================================================================================
+def save_baseline(index, path):
+    """Save a fingerprint index (see `build_index`) as a npz file"""
+    np.savez_compressed(path, **index)
+    return
+
+def load_baseline(path):
+    """Load a fingerprint index saved with `save_baseline`"""
+    with np.load(path) as f:
+        return {key: f[key] for key in f.files}
+#===================================================================================================
+
+#===================================================================================================
+def compare(index, baseline, hash_tol=4, pixel_tol=24):
+    """Compare a fingerprint index to the baseline
+
+    A plot is reported as changed when the hashes differ by more than `hash_tol` bits, when the
+    largest difference between the downsampled images is above `pixel_tol` grey levels, or when
+    the image size changed. All the plots are compared at once with numpy.
+
+    Args:
+        index (dict): fingerprints of the current plots
+        baseline (dict): fingerprints of the reference plots
+        hash_tol (int, optional): tolerated number of different hash bits. Defaults to 4.
+        pixel_tol (int, optional): tolerated difference of the downsampled images, in grey levels
+            (0-255). Defaults to 24.
+
+    Returns:
+        list: one dictionary per changed, missing or new plot
+    """
+    if index['thumbs'].shape[1:] != baseline['thumbs'].shape[1:]:
+        raise ValueError('Index and baseline use different thumbnail sizes')
+
+    report = []
+    common, icur, iref = np.intersect1d(index['names'], baseline['names'], return_indices=True)
+
+    xor     = index['hashes'][icur] ^ baseline['hashes'][iref]
+    hamming = np.unpackbits(xor.view(np.uint8)).reshape(-1, 64).sum(axis=1)
+
+    diff      = np.abs(index['thumbs'][icur].astype(np.int16) - baseline['thumbs'][iref])
+    max_diff  = diff.max(axis=(1, 2), initial=0)
+    mean_diff = diff.mean(axis=(1, 2)) if len(common) else np.zeros(0)
+    resized   = (index['shapes'][icur] != baseline['shapes'][iref]).any(axis=1)
+
+    changed = (hamming > hash_tol) | (max_diff > pixel_tol) | resized
+    for i in np.flatnonzero(changed):
+        report.append({
+            'name'     : str(common[i]),
+            'status'   : 'changed',
+            'hamming'  : int(hamming[i]),
+            'max_diff' : int(max_diff[i]),
+            'mean_diff': float(mean_diff[i]),
+            'resized'  : bool(resized[i]),
+        })
+
+    for name in np.setdiff1d(baseline['names'], index['names']):
+        report.append({'name': str(name), 'status': 'missing'})
+    for name in np.setdiff1d(index['names'], baseline['names']):
+        report.append({'name': str(name), 'status': 'new'})
+    return report
+#===================================================================================================
+
+#===================================================================================================
+def _init_render_worker():
+    import ROOT
+    from . import drawutils
+    ROOT.gROOT.SetBatch(True)
+    drawutils.set_atlas_style()
+    return
+
+def _render_one(args):
+    spec, output = args
+    if isinstance(spec, str):
+        from .replay import replay_plot
+        replay_plot(spec, output=output)
+    else:
+        spec(output)
+    return output
+
+def render_suite(suite, outdir, workers=1):
+    """Render a suite of plots in batch mode
+
+    Args:
+        suite (dict): by plot name, a function called as spec(output) that draws and saves the
+            plot, or the path of a replay file (without extension). Functions must be importable
+            at module level when `workers` > 1.
+        outdir (str): output directory, plots are saved as <outdir>/<name>.png
+        workers (int, optional): number of processes, each with its own ROOT. Defaults to 1.
+
+    Returns:
+        dict: image paths by plot name
+    """
+    jobs = []
+    for name, spec in suite.items():
+        output = os.path.join(outdir, name + '.png')
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        jobs.append((spec, output))
+
+    if workers == 1:
+        _init_render_worker()
+        outputs = [_render_one(job) for job in jobs]
+    else:
+        # spawn, not fork: this process may already hold canvases, files or ROOT threads from
+        # previous plots, which forked workers would inherit (the daemon forks only from a
+        # master that has just imported ROOT and applied the style)
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_render_worker) as pool:
+            outputs = list(pool.map(_render_one, jobs))
+
+    return dict(zip(suite, outputs))
+#===================================================================================================
+
+#===================================================================================================
+def find_images(directory, pattern='**/*.png'):
+    """Find images in a directory, by path relative to it without extension"""
+    paths = glob.glob(os.path.join(directory, pattern), recursive=True)
+    return {os.path.splitext(os.path.relpath(p, directory))[0]: p for p in paths}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare rendered plots to a baseline')
+    parser.add_argument('command', choices=['update', 'check'], help='write the baseline or compare to it')
+    parser.add_argument('baseline', help='baseline index (npz)')
+    parser.add_argument('directory', help='directory with the rendered plots (png)')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='number of processes')
+    parser.add_argument('--size', type=int, default=64, help='side of the downsampled images')
+    parser.add_argument('--hash-tol', type=int, default=4, help='tolerated number of different hash bits')
+    parser.add_argument('--pixel-tol', type=int, default=24, help='tolerated difference in grey levels')
+    args = parser.parse_args(argv)
+
+    index = build_index(find_images(args.directory), args.size, args.workers)
+
+    if args.command == 'update':
+        save_baseline(index, args.baseline)
+        print(f'Saved {len(index["names"])} fingerprints to {args.baseline}')
+        return 0
+
+    report = compare(index, load_baseline(args.baseline), args.hash_tol, args.pixel_tol)
+    for entry in report:
+        if entry['status'] == 'changed':
+            print('{:8s} {}  (hash bits: {}, max diff: {}, mean diff: {:.2f}{})'.format(
+                entry['status'], entry['name'], entry['hamming'], entry['max_diff'], entry['mean_diff'],
+                ', resized' if entry['resized'] else ''))
+        else:
+            print('{:8s} {}'.format(entry['status'], entry['name']))
+    print(f'{len(report)} of {len(index["names"])} plots differ from the baseline')
+    return 1 if report else 0
+#===================================================================================================
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,361 @@
+import os
+import sys
+import json
+import argparse
+from array import array
+
+import ROOT
+import numpy as np
+
+from . import drawutils
+
+# methods of ROOT objects whose first argument is the output file
+_output_methods = ('SaveAs', 'Print')
+
+
+#===================================================================================================
+class PlotRecorder:
+    """Record the data and the drawutils calls used to build a plot
+
+    Histograms and graphs registered with `add` are stored as numpy arrays, and every call made
+    through `call` (drawutils functions) or `method` (methods of ROOT objects, e.g. Draw or SaveAs)
+    is stored together with its arguments. The result can be saved next to the image with `save`
+    and re-rendered with new style options by `replay_plot`, without reading the original inputs.
+
+    Example:
+        rec = PlotRecorder()
+        h   = rec.add('data', h_data)
+        can = rec.call(format_canvas, False, name='c', ret='can')
+        rec.call(set_style, h, color='blue')
+        rec.method(h, 'Draw', 'e')
+        rec.method(can, 'SaveAs', 'plot.png')
+        rec.save('plot')
+    """
+
+    def __init__(self):
+        self.objects = {}
+        self.data    = {}
+        self.arrays  = {}
+        self.calls   = []
+
+    def add(self, key, obj):
+        """Register a histogram or graph whose data is stored in the replay file
+
+        Args:
+            key (str): name used to refer to the object in the replay file and in the overrides
+            obj (TH1 or TGraph): 1D histogram or graph
+
+        Returns:
+            TH1 or TGraph: the same object, for convenience
+        """
+        if key in self.objects:
+            raise KeyError(f'Object "{key}" already registered')
+
+        if obj.InheritsFrom('TH1') and obj.GetDimension() == 1:
+            edges, contents, errors = drawutils.hist_to_arrays(obj)
+            self.data[key] = {
+                'kind'    : 'TH1',
+                'edges'   : edges,
+                'contents': contents,
+                'errors'  : errors,
+            }
+        elif obj.InheritsFrom('TGraph'):
+            npoints = obj.GetN()
+            self.data[key] = {
+                'kind': 'TGraph',
+                'x'   : np.array([obj.GetPointX(i)     for i in range(npoints)]),
+                'y'   : np.array([obj.GetPointY(i)     for i in range(npoints)]),
+                'exl' : np.array([obj.GetErrorXlow(i)  for i in range(npoints)]),
+                'exh' : np.array([obj.GetErrorXhigh(i) for i in range(npoints)]),
+                'eyl' : np.array([obj.GetErrorYlow(i)  for i in range(npoints)]),
+                'eyh' : np.array([obj.GetErrorYhigh(i) for i in range(npoints)]),
+            }
+        else:
+            raise TypeError(f'Cannot record object of class {obj.ClassName()}, only 1D histograms and graphs')
+
+        self.objects[key] = obj
+        return obj
+
+    def call(self, func, *args, ret=None, **kwargs):
+        """Call a drawutils function and record it
+
+        Args:
+            func (function): drawutils function
+            ret (str or tuple, optional): key(s) under which the returned object(s) are registered,
+                so that later calls can use them. Defaults to None.
+
+        Returns:
+            *: whatever `func` returns
+        """
+        if getattr(drawutils, func.__name__, None) is not func:
+            raise ValueError(f'Only drawutils functions can be recorded, got {func.__name__}')
+
+        entry = {
+            'func'  : func.__name__,
+            'args'  : [self._encode(a) for a in args],
+            'kwargs': {k: self._encode(v) for k, v in kwargs.items()},
+            'ret'   : ret,
+        }
+        result = func(*args, **kwargs)
+        self.calls.append(entry)
+        _store_result(self.objects, ret, result)
+        return result
+
+    def method(self, obj, name, *args, ret=None):
+        """Call a method of a registered ROOT object and record it
+
+        Args:
+            obj (*): registered object (see `add` and the `ret` argument of `call`)
+            name (str): name of the method, e.g. Draw, cd or SaveAs
+            ret (str or tuple, optional): key(s) under which the returned object(s) are registered.
+                Defaults to None.
+
+        Returns:
+            *: whatever the method returns
+        """
+        entry = {
+            'obj'   : self._encode(obj, strict=True)['__ref__'],
+            'method': name,
+            'args'  : [self._encode(a) for a in args],
+            'ret'   : ret,
+        }
+        result = getattr(obj, name)(*args)
+        self.calls.append(entry)
+        _store_result(self.objects, ret, result)
+        return result
+
+    def save(self, path):
+        """Save the replay file as `path`.npz (data) and `path`.json (calls)
+
+        Both files are written to temporary files first and then renamed, so a failure never
+        leaves a truncated replay file.
+
+        Args:
+            path (str): output path without extension
+        """
+        arrays = {}
+        kinds  = {}
+        for key, data in self.data.items():
+            kinds[key] = data['kind']
+            for field, values in data.items():
+                if field != 'kind':
+                    arrays[f'{key}/{field}'] = values
+        for key, values in self.arrays.items():
+            arrays[f'__array__/{key}'] = values
+
+        text = json.dumps({'version': 1, 'objects': kinds, 'calls': self.calls}, indent=1)
+        with open(path + '.npz.tmp', 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        with open(path + '.json.tmp', 'w') as f:
+            f.write(text)
+        os.replace(path + '.npz.tmp', path + '.npz')
+        os.replace(path + '.json.tmp', path + '.json')
+        return
+
+    def _encode(self, value, strict=False):
+        if value is None and not strict:
+            return None
+        for key, obj in self.objects.items():
+            if value is obj:
+                return {'__ref__': key}
+        if hasattr(value, 'IsA'):
+            address = ROOT.addressof(value)
+            for key, obj in self.objects.items():
+                if hasattr(obj, 'IsA') and ROOT.addressof(obj) == address:
+                    return {'__ref__': key}
+            raise ValueError(f'Object {value.GetName()} is not registered in the recorder')
+        if strict:
+            raise ValueError(f'{value!r} is not a registered object')
+
+        if isinstance(value, (list, tuple)):
+            return [self._encode(v) for v in value]
+        if isinstance(value, dict):
+            return {k: self._encode(v) for k, v in value.items()}
+        if isinstance(value, np.ndarray):
+            # arrays go to the npz file, the JSON only keeps a reference
+            key = str(len(self.arrays))
+            self.arrays[key] = np.array(value)
+            return {'__array__': key}
+        if isinstance(value, np.generic):
+            return value.item()
+        if not isinstance(value, (str, int, float, bool)):
+            raise TypeError(f'Cannot record argument of type {type(value).__name__}')
+        return value
+#===================================================================================================
+
+#===================================================================================================
+def _store_result(objects, ret, result):
+    # None results are not stored: they would match every None argument of the later calls
+    if ret is None or result is None:
+        return
+    if isinstance(ret, str):
+        objects[ret] = result
+    else:
+        for key, obj in zip(ret, result):
+            if obj is not None:
+                objects[key] = obj
+    return
+#===================================================================================================
+
+#===================================================================================================
+def load_replay(path):
+    """Load a replay file
+
+    Args:
+        path (str): path of the replay file without extension
+
+    Returns:
+        tuple: dictionary with the rebuilt ROOT objects and list of recorded calls
+    """
+    with open(path + '.json') as f:
+        record = json.load(f)
+
+    arrays  = np.load(path + '.npz')
+    objects = {}
+    for key, kind in record['objects'].items():
+        if kind == 'TH1':
+            edges    = arrays[f'{key}/edges']
+            contents = np.ascontiguousarray(arrays[f'{key}/contents'], dtype=np.float64)
+            errors   = np.ascontiguousarray(arrays[f'{key}/errors'], dtype=np.float64)
+            h = ROOT.TH1D(key, '', len(edges)-1, array('d', edges))
+            h.SetDirectory(0)
+            h.SetContent(contents)
+            h.Sumw2()
+            h.GetSumw2().Set(len(errors), errors**2)
+            h.SetEntries(contents.sum())
+            objects[key] = h
+        elif kind == 'TGraph':
+            fields = [np.ascontiguousarray(arrays[f'{key}/{field}'], dtype=np.float64)
+                      for field in ('x', 'y', 'exl', 'exh', 'eyl', 'eyh')]
+            g = ROOT.TGraphAsymmErrors(len(fields[0]), *fields)
+            g.SetName(key)
+            objects[key] = g
+        else:
+            raise ValueError(f'Unknown object kind "{kind}" in {path}.json')
+
+    def decode_arrays(value):
+        if isinstance(value, dict):
+            if '__array__' in value:
+                return arrays[f"__array__/{value['__array__']}"]
+            return {k: decode_arrays(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [decode_arrays(v) for v in value]
+        return value
+
+    return objects, decode_arrays(record['calls'])
+#===================================================================================================
+
+#===================================================================================================
+def replay_plot(path, overrides=None, output=None):
+    """Re-render a plot from its replay file
+
+    Overrides are given as a dictionary whose keys are either a function name, applied to all
+    the calls of that function, or "function:key", applied only to the calls whose first argument
+    is the object registered as `key`. Values are dictionaries of keyword arguments, e.g.
+    {'set_style:data': {'color': 'red'}, 'format_upper_pad_axis': {'yrange': [0, 100]}}.
+
+    With `output`, the recorded SaveAs/Print calls write to the base name of `output` with their
+    own extension, adding a "_<n>" suffix when an extension was recorded more than once. If none
+    of them has the extension of `output`, the object of the last call is also saved as `output`,
+    so that `output` always exists afterwards.
+
+    Args:
+        path (str): path of the replay file without extension
+        overrides (dict, optional): keyword arguments replacing the recorded ones. Defaults to None.
+        output (str, optional): new output path for SaveAs/Print calls. Defaults to None.
+
+    Returns:
+        tuple: ROOT objects used in the plot, by key, and list of the files written
+    """
+    overrides = overrides or {}
+    objects, calls = load_replay(path)
+
+    saves = [entry for entry in calls if entry.get('method') in _output_methods and entry['args']]
+    if output is not None and not saves:
+        raise ValueError(f'{path}.json has no SaveAs or Print call to write {output}')
+
+    def decode(value):
+        if isinstance(value, dict):
+            if '__ref__' in value:
+                return objects[value['__ref__']]
+            return {k: decode(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [decode(v) for v in value]
+        return value
+
+    outputs = []
+    for entry in calls:
+        args = [decode(a) for a in entry['args']]
+
+        if 'method' in entry:
+            if entry['method'] in _output_methods and args:
+                if output is not None:
+                    args[0] = _output_path(output, args[0], outputs)
+                outputs.append(args[0])
+            result = getattr(objects[entry['obj']], entry['method'])(*args)
+        else:
+            func   = getattr(drawutils, entry['func'])
+            kwargs = {k: decode(v) for k, v in entry['kwargs'].items()}
+            kwargs.update(overrides.get(entry['func'], {}))
+            first = entry['args'][0] if entry['args'] else None
+            if isinstance(first, dict) and '__ref__' in first:
+                kwargs.update(overrides.get(f"{entry['func']}:{first['__ref__']}", {}))
+            result = func(*args, **kwargs)
+
+        _store_result(objects, entry['ret'], result)
+
+    if output is not None and output not in outputs:
+        objects[saves[-1]['obj']].SaveAs(output)
+        outputs.append(output)
+
+    return objects, outputs
+
+def _output_path(output, recorded, taken):
+    # output base name with the recorded extension, numbered if already written by this replay
+    base, ext = os.path.splitext(output)[0], os.path.splitext(recorded)[1]
+    path = base + ext
+    n = 1
+    while path in taken:
+        path = f'{base}_{n}{ext}'
+        n += 1
+    return path
+#===================================================================================================
+
+#===================================================================================================
+def _parse_override(text):
+    # "set_style:data.color=red" -> ('set_style:data', 'color', 'red')
+    target, value = text.split('=', 1)
+    target, kwarg = target.rsplit('.', 1)
+    try:
+        value = json.loads(value)
+    except json.JSONDecodeError:
+        pass
+    return target, kwarg, value
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Re-render a plot from its replay file')
+    parser.add_argument('path', help='replay file, with or without the .json/.npz extension')
+    parser.add_argument('-o', '--output', default=None, help='new output path')
+    parser.add_argument('-s', '--set', dest='overrides', action='append', default=[],
+                        help='override as function[:key].kwarg=value, e.g. set_style:data.color=red')
+    args = parser.parse_args(argv)
+
+    ROOT.gROOT.SetBatch(True)
+
+    path = args.path
+    if path.endswith('.json') or path.endswith('.npz'):
+        path = os.path.splitext(path)[0]
+
+    overrides = {}
+    for text in args.overrides:
+        target, kwarg, value = _parse_override(text)
+        overrides.setdefault(target, {})[kwarg] = value
+
+    _, outputs = replay_plot(path, overrides, args.output)
+    for output in outputs:
+        print(output)
+    return 0
+#===================================================================================================
+
+if __name__ == '__main__':
+    sys.exit(main())
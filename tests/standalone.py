@@ -0,0 +1,22 @@
+import os
+import sys
+import importlib
+import importlib.util
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_module(name):
+    """Import drawutils.<name>, or the file on its own when the package cannot be imported
+
+    Only for the modules that use the rest of the package lazily (daemon, aio, regression):
+    their tests then also run where ROOT is not installed.
+    """
+    if 'drawutils' in sys.modules:
+        return importlib.import_module(f'drawutils.{name}')
+
+    spec   = importlib.util.spec_from_file_location(f'drawutils_{name}', os.path.join(root, f'{name}.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
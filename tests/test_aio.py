@@ -0,0 +1,135 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from standalone import import_module
+
+aio = import_module('aio')
+
+
+def _renderer(max_queue=32):
+    # the scheduling logic does not depend on the worker being a process: a thread keeps
+    # the tests free of ROOT
+    renderer = aio.AsyncRenderer(max_queue=max_queue, style=None)
+    renderer._executor = ThreadPoolExecutor(1)
+    return renderer
+
+def _write(output, text='plot'):
+    with open(output, 'w') as f:
+        f.write(text)
+
+async def _wait_for(condition, timeout=5.):
+    for _ in range(int(timeout/0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise TimeoutError
+
+
+def test_render(tmp_path):
+    renderer = _renderer()
+    output   = str(tmp_path / 'plot.png')
+
+    async def main():
+        path    = await renderer.render(_write, output)
+        content = await renderer.render(_write, output, return_bytes=True, text='new')
+        return path, content
+
+    assert asyncio.run(main()) == (output, b'new')
+    metrics = renderer.metrics()
+    assert metrics['queue_depth'] == 0
+    assert metrics['submitted'] == metrics['completed'] == 2
+    assert metrics['run_max'] >= metrics['run_mean'] >= 0.
+    renderer.close()
+
+def test_failed_job(tmp_path):
+    renderer = _renderer()
+
+    def fail(output):
+        raise ValueError(output)
+
+    with pytest.raises(ValueError):
+        asyncio.run(renderer.render(fail, str(tmp_path / 'plot.png')))
+    metrics = renderer.metrics()
+    assert (metrics['failed'], metrics['completed'], metrics['queue_depth']) == (1, 0, 0)
+    assert 'run_mean' not in metrics
+    renderer.close()
+
+def test_backpressure(tmp_path):
+    renderer = _renderer(max_queue=2)
+    release  = threading.Event()
+
+    def block(output):
+        release.wait(5.)
+
+    async def main():
+        tasks = [asyncio.create_task(renderer.render(block, str(tmp_path / f'{i}.png'))) for i in range(3)]
+        await _wait_for(lambda: renderer.metrics()['submitted'] == 2)
+        await asyncio.sleep(0.05)
+        # the third call waits for a free slot
+        assert renderer.metrics()['submitted'] == 2
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    assert len(asyncio.run(main())) == 3
+    assert renderer.metrics()['completed'] == 3
+    renderer.close()
+
+def test_cancel_before_start(tmp_path):
+    renderer = _renderer()
+    release  = threading.Event()
+
+    def block(output):
+        release.wait(5.)
+
+    async def main():
+        running = asyncio.create_task(renderer.render(block, str(tmp_path / 'a.png')))
+        waiting = asyncio.create_task(renderer.render(block, str(tmp_path / 'b.png')))
+        await _wait_for(lambda: renderer.metrics()['submitted'] == 2)
+        waiting.cancel()
+        await _wait_for(lambda: renderer.metrics()['cancelled'] == 1)
+        release.set()
+        await running
+
+    asyncio.run(main())
+    metrics = renderer.metrics()
+    assert (metrics['completed'], metrics['cancelled'], metrics['queue_depth']) == (1, 1, 0)
+    renderer.close()
+
+def test_several_event_loops(tmp_path):
+    renderer = _renderer(max_queue=1)
+    output   = str(tmp_path / 'plot.png')
+    for _ in range(2):
+        assert asyncio.run(renderer.render(_write, output)) == output
+    assert renderer.metrics()['completed'] == 2
+    renderer.close()
+
+
+def _broken_future():
+    future = Future()
+    future.set_exception(BrokenProcessPool())
+    return future
+
+def test_broken_pool_drops_executor():
+    renderer  = aio.AsyncRenderer()
+    executor  = renderer._executor = object()
+    renderer._pending = 1
+    renderer._job_done(_broken_future(), executor, 0.)
+    assert renderer._executor is None
+    assert renderer.metrics()['failed'] == 1
+
+def test_stale_broken_pool_keeps_executor():
+    renderer = aio.AsyncRenderer()
+    current  = renderer._executor = object()
+    renderer._pending = 1
+    renderer._job_done(_broken_future(), object(), 0.)
+    assert renderer._executor is current
+
+def test_release_after_loop_closed():
+    loop  = asyncio.new_event_loop()
+    slots = asyncio.Semaphore(1)
+    loop.close()
+    aio._release(loop, slots)
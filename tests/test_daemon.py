@@ -0,0 +1,92 @@
+import os
+import json
+import socket
+import threading
+
+import pytest
+
+from standalone import import_module
+
+daemon = import_module('daemon')
+
+
+def _daemon(**kwargs):
+    # the job handling without the ROOT cleanup around it
+    server = daemon.RenderDaemon(**kwargs)
+    server._snapshot = lambda: None
+    server._reset    = lambda before: None
+    return server
+
+def _handle(server, request):
+    worker, client = socket.socketpair()
+    with worker, client:
+        worker.settimeout(server.timeout)
+        client.sendall(request)
+        server._handle(worker)
+        return json.loads(daemon._recv_line(client))
+
+
+def test_recv_line():
+    a, b = socket.socketpair()
+    with a, b:
+        a.sendall(b'{"a": ')
+        a.sendall(b'1}\n')
+        assert daemon._recv_line(b) == b'{"a": 1}\n'
+        a.close()
+        assert daemon._recv_line(b) == b''
+
+def test_handle_function_job():
+    answer = _handle(_daemon(), b'{"func": "os.path:join", "args": ["a", "b"]}\n')
+    assert answer['status'] == 'ok'
+    assert answer['output'] == 'a/b'
+
+def test_handle_error():
+    answer = _handle(_daemon(), b'{"func": "os.path:missing"}\n')
+    assert answer['status'] == 'error'
+    assert answer['error'].startswith('AttributeError')
+
+def test_handle_timeout():
+    # the client connects but never finishes its line
+    answer = _handle(_daemon(timeout=0.1), b'{"func": ')
+    assert answer['status'] == 'error'
+    assert answer['error'].startswith('TimeoutError')
+
+
+def test_bind_socket_permissions(tmp_path):
+    path = str(tmp_path / 'd.sock')
+    with daemon._bind_socket(path, 1):
+        assert os.stat(path).st_mode & 0o777 == 0o600
+
+def test_bind_socket_refuses_live_daemon(tmp_path):
+    path = str(tmp_path / 'd.sock')
+    with daemon._bind_socket(path, 1):
+        with pytest.raises(RuntimeError):
+            daemon._bind_socket(path, 1)
+        assert os.path.exists(path)
+
+def test_bind_socket_replaces_stale_socket(tmp_path):
+    path = str(tmp_path / 'd.sock')
+    # a daemon killed before removing its socket
+    daemon._bind_socket(path, 1).close()
+    with daemon._bind_socket(path, 1) as sock:
+        assert sock.getsockname() == path
+
+def test_bind_socket_refuses_other_files(tmp_path):
+    path = tmp_path / 'd.sock'
+    path.write_text('')
+    with pytest.raises(FileExistsError):
+        daemon._bind_socket(str(path), 1)
+
+def test_submit(tmp_path):
+    path = str(tmp_path / 'd.sock')
+    with daemon._bind_socket(path, 1) as sock:
+        def serve():
+            conn, _ = sock.accept()
+            with conn:
+                job = json.loads(daemon._recv_line(conn))
+                conn.sendall(json.dumps({'status': 'ok', 'output': job['kwargs']['output']}).encode() + b'\n')
+        server = threading.Thread(target=serve)
+        server.start()
+        answer = daemon.submit({'func': 'mod:draw', 'kwargs': {'output': 'm.png'}}, path, timeout=5.)
+        server.join()
+    assert answer == {'status': 'ok', 'output': 'm.png'}
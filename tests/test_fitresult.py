@@ -0,0 +1,73 @@
+import csv
+import json
+from array import array
+
+import numpy as np
+import pytest
+
+ROOT = pytest.importorskip('ROOT')
+pytest.importorskip('seaborn')
+
+from drawutils import drawutils as du
+
+
+def test_fit_summary_lines():
+    summary = du.get_fit_summary({'chi2': 10., 'ndof': 5, 'chi2_o_ndof': 2., 'pvalue': 0.07,
+                                  'nbkg': 100., 'nbkgerr': 10.})
+    assert summary['lines'] == [
+        'Chi2 / NDF  = 10.00 / 5 = 2.000',
+        'p-value     = 0.07',
+        'N_{bkg}     = 100.0000 #pm 10.00000',
+    ]
+    assert len(summary['params']) == 0
+
+def test_fit_summary_tf1():
+    func = ROOT.TF1('f_summary', 'pol1', 0., 1.)
+    func.SetParameters(1.5, 0.005)
+    func.SetParErrors(array('d', [0.1, 0.001]))
+    summary = du.get_fit_summary(func)
+    assert summary['kind'] == 'TF1'
+    assert list(summary['params']['name']) == ['p0', 'p1']
+    np.testing.assert_allclose(summary['params']['value'], [1.5, 0.005])
+    np.testing.assert_allclose(summary['params']['error'], [0.1, 0.001])
+    assert summary['lines'][1:] == ['p0         = 1.50 +/- 0.10', 'p1         = 0.0050 +/- 0.0010']
+
+    pave = du.draw_fitresult(0.1, 0.5, 0.1, 0.5, summary)
+    assert [line.GetTitle() for line in pave.GetListOfLines()] == summary['lines']
+
+def test_fit_summary_long_names():
+    title = '#mu_{signal}^{' + 'very long LaTeX title ' * 4 + '}'
+    var   = ROOT.RooRealVar('mu_long', title, 1.2, 0., 5.)
+    var.setError(0.3)
+    summary = du.get_fit_summary({'chi2': 1., 'variables': ROOT.RooArgList(var)})
+    assert summary['params']['name'][0] == title
+    assert summary['lines'][-1] == f'{title} = 1.20 +/- 0.30'
+
+    func = ROOT.TF1('f_long', 'pol0', 0., 1.)
+    func.SetParName(0, title)
+    assert du.get_fit_summary(func)['params']['name'][0] == title
+
+def test_export_fit_summaries(tmp_path):
+    func = ROOT.TF1('f_export', 'pol1', 0., 1.)
+    func.SetParameters(1., 2.)
+    summaries = {
+        'fit': du.get_fit_summary(func),
+        'chi2only': du.get_fit_summary({'chi2': 3.}),
+    }
+
+    du.export_fit_summaries(summaries, str(tmp_path / 'fits.csv'))
+    with open(tmp_path / 'fits.csv') as f:
+        rows = list(csv.DictReader(f))
+    assert [(row['plot'], row['parameter']) for row in rows] == [('fit', 'p0'), ('fit', 'p1'), ('chi2only', '')]
+    assert float(rows[1]['value']) == 2.
+    assert float(rows[2]['chi2']) == 3.
+
+    du.export_fit_summaries(summaries, str(tmp_path / 'fits.json'))
+    with open(tmp_path / 'fits.json') as f:
+        table = json.load(f)
+    assert table['fit']['kind'] == 'TF1'
+    assert [par['name'] for par in table['fit']['params']] == ['p0', 'p1']
+    assert table['chi2only']['chi2'] == 3. and table['chi2only']['ndof'] is None
+
+    with pytest.raises(ValueError):
+        du.export_fit_summaries(summaries, str(tmp_path / 'fits.txt'))
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from standalone import import_module
+
+regression = import_module('regression')
+
+
+def _plot(path, offset=0, size=(800, 600), box=False, mode='RGB'):
+    img  = Image.new('RGB', size, 'white')
+    draw = ImageDraw.Draw(img)
+    draw.line([(50, size[1]-100), (size[0]-50, 100+offset)], fill='black', width=3)
+    if box:
+        draw.rectangle([300, 200, 500, 400], fill='red')
+    img.convert(mode).save(path)
+    return str(path)
+
+
+@pytest.fixture
+def baseline(tmp_path):
+    images = {f'p{i}': _plot(tmp_path / f'ref{i}.png', offset=10*i) for i in range(4)}
+    return regression.build_index(images, workers=1)
+
+
+def test_fingerprint_palette_image(tmp_path):
+    hash_, thumb, shape = regression.fingerprint(_plot(tmp_path / 'p.png', mode='P'), size=32)
+    assert shape == (800, 600)
+    assert thumb.shape == (32, 32) and thumb.dtype == np.uint8
+    assert 0 <= hash_ < 2**64
+
+
+def test_compare_identical(tmp_path, baseline):
+    images = {f'p{i}': _plot(tmp_path / f'cur{i}.png', offset=10*i) for i in range(4)}
+    assert regression.compare(regression.build_index(images, workers=1), baseline) == []
+
+
+def test_compare_reports_changes(tmp_path, baseline):
+    images = {
+        'p0': _plot(tmp_path / 'cur0.png', box=True),
+        'p1': _plot(tmp_path / 'cur1.png', offset=10, size=(400, 300)),
+        'p2': _plot(tmp_path / 'cur2.png', offset=20),
+        'p9': _plot(tmp_path / 'cur9.png'),
+    }
+    report = regression.compare(regression.build_index(images, workers=1), baseline)
+    status = {entry['name']: entry['status'] for entry in report}
+    assert status == {'p0': 'changed', 'p1': 'changed', 'p3': 'missing', 'p9': 'new'}
+
+    changed = {entry['name']: entry for entry in report if entry['status'] == 'changed'}
+    assert changed['p0']['max_diff'] > 24 and not changed['p0']['resized']
+    assert changed['p1']['resized']
+
+
+def test_compare_thumbnail_size_mismatch(tmp_path, baseline):
+    index = regression.build_index({'p0': _plot(tmp_path / 'cur0.png')}, size=32, workers=1)
+    with pytest.raises(ValueError):
+        regression.compare(index, baseline)
+
+
+def test_baseline_roundtrip(tmp_path, baseline):
+    path = str(tmp_path / 'baseline.npz')
+    regression.save_baseline(baseline, path)
+    loaded = regression.load_baseline(path)
+    assert sorted(loaded) == sorted(baseline)
+    for key in baseline:
+        np.testing.assert_array_equal(loaded[key], baseline[key])
+    assert regression.compare(baseline, loaded) == []
@@ -0,0 +1,130 @@
+import os
+from array import array
+
+import numpy as np
+import pytest
+
+ROOT = pytest.importorskip('ROOT')
+pytest.importorskip('seaborn')
+
+from drawutils import drawutils as du
+from drawutils import replay
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('set_style:data.color=red'        , ('set_style:data', 'color', 'red')),
+    ('set_style.alpha=0.5'             , ('set_style', 'alpha', 0.5)),
+    ('format_upper_pad_axis.yrange=[0, 100]', ('format_upper_pad_axis', 'yrange', [0, 100])),
+    ('set_style:data.xtitle=m_{jj}=x'  , ('set_style:data', 'xtitle', 'm_{jj}=x')),
+])
+def test_parse_override(text, expected):
+    assert replay._parse_override(text) == expected
+
+def test_package_exports():
+    import drawutils
+    assert drawutils.replay is replay
+    assert drawutils.replay_plot is replay.replay_plot
+    assert drawutils.PlotRecorder is replay.PlotRecorder
+
+
+def _hist(name):
+    h = ROOT.TH1D(name, '', 3, 0., 3.)
+    h.SetDirectory(0)
+    for ibin, content in enumerate([10., 20., 30.], 1):
+        h.SetBinContent(ibin, content)
+    return h
+
+def test_none_result_is_not_a_reference():
+    rec = replay.PlotRecorder()
+    h   = rec.add('data', _hist('h_none'))
+    rec.call(du.set_style, h, ret='nothing')
+    rec.call(du.set_style, h, xtitle=None)
+    assert 'nothing' not in rec.objects
+    assert rec.calls[1]['kwargs']['xtitle'] is None
+
+def test_unsupported_argument():
+    rec = replay.PlotRecorder()
+    h   = rec.add('data', _hist('h_unsupported'))
+    with pytest.raises(TypeError):
+        rec.call(du.set_style, h, color=object())
+    assert rec.calls == []
+
+def test_array_arguments_roundtrip(tmp_path):
+    variations = np.array([[11., 19., 33.], [9., 21., 28.]])
+    rec = replay.PlotRecorder()
+    h   = rec.add('nominal', _hist('h_nominal'))
+    rec.call(du.get_syst_band, h, variations, ret=('band', 'ratio'))
+
+    path = str(tmp_path / 'plot')
+    rec.save(path)
+    assert sorted(os.listdir(tmp_path)) == ['plot.json', 'plot.npz']
+
+    objects, calls = replay.load_replay(path)
+    np.testing.assert_array_equal(calls[0]['args'][1], variations)
+
+    objects, outputs = replay.replay_plot(path)
+    assert outputs == []
+    assert objects['band'].GetN() == 3
+    assert objects['band'].GetErrorYhigh(2) == pytest.approx(3.)
+
+
+def _record_saves(tmp_path, extensions):
+    ROOT.gROOT.SetBatch(True)
+    rec = replay.PlotRecorder()
+    h   = rec.add('data', _hist('h_saves'))
+    can = rec.call(du.format_canvas, False, name='c_saves', ret='can')
+    rec.method(h, 'Draw', 'hist')
+    for ext in extensions:
+        rec.method(can, 'SaveAs', str(tmp_path / f'recorded{ext}'))
+    path = str(tmp_path / 'plot')
+    rec.save(path)
+    return path
+
+def test_replay_output_keeps_recorded_extensions(tmp_path):
+    path = _record_saves(tmp_path, ['.png', '.pdf', '.png'])
+    output = str(tmp_path / 'new.png')
+    _, outputs = replay.replay_plot(path, output=output)
+    assert outputs == [output, str(tmp_path / 'new.pdf'), str(tmp_path / 'new_1.png')]
+    assert all(os.path.exists(p) for p in outputs)
+
+def test_replay_output_extension_not_recorded(tmp_path):
+    path = _record_saves(tmp_path, ['.pdf'])
+    output = str(tmp_path / 'new.png')
+    _, outputs = replay.replay_plot(path, output=output)
+    assert outputs == [str(tmp_path / 'new.pdf'), output]
+    assert os.path.exists(output)
+
+def test_replay_output_without_saves(tmp_path):
+    rec = replay.PlotRecorder()
+    rec.add('data', _hist('h_nosave'))
+    path = str(tmp_path / 'plot')
+    rec.save(path)
+    with pytest.raises(ValueError):
+        replay.replay_plot(path, output=str(tmp_path / 'new.png'))
+
+
+def _hist_arrays(name, contents, errors=None, edges=(0., 1., 2., 3.), cls='TH1D'):
+    h = getattr(ROOT, cls)(name, '', len(edges)-1, array('d', edges))
+    h.SetDirectory(0)
+    for ibin, content in enumerate(contents, 1):
+        h.SetBinContent(ibin, content)
+        if errors is not None:
+            h.SetBinError(ibin, errors[ibin-1])
+    return h
+
+def test_hist_to_arrays():
+    h = _hist_arrays('h_arrays', [1., 4., 9.], errors=[0.5, 1., 1.5], edges=(0., 1., 5., 10.))
+    edges, contents, errors = du.hist_to_arrays(h)
+    np.testing.assert_array_equal(edges, [0., 1., 5., 10.])
+    np.testing.assert_array_equal(contents, [0., 1., 4., 9., 0.])
+    np.testing.assert_allclose(errors, [0., 0.5, 1., 1.5, 0.])
+
+def test_hist_to_arrays_th1c():
+    h = _hist_arrays('h_char', [1., 2., 3.], cls='TH1C')
+    np.testing.assert_array_equal(du.hist_to_arrays(h)[1], [0., 1., 2., 3., 0.])
+
+def test_hist_to_arrays_rejects_2d():
+    h = ROOT.TH2D('h_2d', '', 3, 0., 3., 3, 0., 3.)
+    h.SetDirectory(0)
+    with pytest.raises(ValueError):
+        du.hist_to_arrays(h)
@@ -0,0 +1,76 @@
+import pytest
+
+ROOT = pytest.importorskip('ROOT')
+pytest.importorskip('seaborn')
+
+from drawutils import drawutils as du
+
+
+def _palette():
+    palette = ROOT.TColor.GetPalette()
+    return [palette[i] for i in range(palette.GetSize())]
+
+def test_use_style_discards_gstyle_changes():
+    du.use_style('atlas')
+    assert ROOT.gStyle.GetName() == 'drawutils_atlas'
+    assert ROOT.gStyle.GetPadLeftMargin() == pytest.approx(0.16)
+
+    ROOT.gStyle.SetPadLeftMargin(0.3)
+    assert du.get_style('atlas').GetPadLeftMargin() == pytest.approx(0.16)
+    du.use_style('atlas')
+    assert ROOT.gStyle.GetPadLeftMargin() == pytest.approx(0.16)
+
+def test_style_scope_restores_previous_style():
+    du.use_style('default')
+    with du.style_scope('atlas') as style:
+        assert style.GetName() == ROOT.gStyle.GetName() == 'drawutils_atlas'
+    assert ROOT.gStyle.GetName() == 'drawutils_default'
+
+def test_style_scope_restores_unregistered_style():
+    user = ROOT.TStyle('user_style', 'not a drawutils style')
+    user.cd()
+    ROOT.gStyle.SetPalette(ROOT.kBird)
+    palette = _palette()
+
+    with pytest.raises(RuntimeError):
+        with du.style_scope('atlas'):
+            assert ROOT.gStyle.GetName() == 'drawutils_atlas'
+            assert _palette() != palette
+            raise RuntimeError
+    assert ROOT.gStyle.GetName() == 'user_style'
+    assert _palette() == palette
+    du.use_style('atlas')
+
+
+@pytest.fixture
+def builders():
+    saved = dict(du._style_builders)
+    yield
+    du._style_builders.clear()
+    du._style_builders.update(saved)
+    for name in saved:
+        if name in du._styles:
+            du.get_style(name, rebuild=True)
+    du.use_style('atlas')
+
+def test_register_style(builders):
+    du.register_style('test_wide', lambda style: style.SetPadLeftMargin(0.25), palette=ROOT.kBird)
+    with du.style_scope('test_wide'):
+        assert ROOT.gStyle.GetPadLeftMargin() == pytest.approx(0.25)
+        assert ROOT.gStyle.GetPadRightMargin() == pytest.approx(0.05)
+    with pytest.raises(KeyError):
+        du.register_style('test_other', lambda style: None, base='unknown')
+
+def test_register_style_on_itself(builders):
+    du.register_style('test_derived', lambda style: style.SetPadLeftMargin(0.25))
+    assert du.get_style('test_derived').GetOptStat() == 0
+
+    du.register_style('atlas', lambda style: style.SetOptStat(1), base='atlas')
+    assert du.get_style('atlas').GetOptStat() == 1
+    assert du.get_style('atlas').GetPadLeftMargin() == pytest.approx(0.16)
+    # the cached template of the derived style is rebuilt
+    assert du.get_style('test_derived').GetOptStat() == 1
+    assert du.get_style('test_derived').GetPadLeftMargin() == pytest.approx(0.25)
+
+    with pytest.raises(ValueError):
+        du.register_style('atlas', lambda style: None, base='test_derived')
@@ -0,0 +1,102 @@
+from array import array
+
+import numpy as np
+import pytest
+
+ROOT = pytest.importorskip('ROOT')
+pytest.importorskip('seaborn')
+
+from drawutils import drawutils as du
+
+
+def _hist(name, contents, errors=None, edges=(0., 1., 2., 3.), cls='TH1D'):
+    h = getattr(ROOT, cls)(name, '', len(edges)-1, array('d', edges))
+    h.SetDirectory(0)
+    for ibin, content in enumerate(contents, 1):
+        h.SetBinContent(ibin, content)
+        if errors is not None:
+            h.SetBinError(ibin, errors[ibin-1])
+    return h
+def _yerrors(graph):
+    npoints = graph.GetN()
+    down = np.array([graph.GetErrorYlow(i)  for i in range(npoints)])
+    up   = np.array([graph.GetErrorYhigh(i) for i in range(npoints)])
+    return down, up
+# shifts with respect to the nominal: [1, 0, 3], [-1, 1, -2], [0, -2, 0], [2, 0, 0]
+nominal_contents = [10., 20., 30.]
+variations = np.array([
+    [11., 20., 33.],
+    [ 9., 21., 28.],
+    [10., 18., 30.],
+    [12., 20., 30.],
+])
+
+def test_syst_band_quadrature():
+    nominal = _hist('h_nom_quad', nominal_contents)
+    band, ratio = du.get_syst_band(nominal, variations)
+
+    down, up = _yerrors(band)
+    np.testing.assert_allclose(up  , [np.sqrt(5.), 1., 3.])
+    np.testing.assert_allclose(down, [1., 2., 2.])
+
+    ratio_down, ratio_up = _yerrors(ratio)
+    np.testing.assert_allclose(ratio_up  , up / nominal_contents)
+    np.testing.assert_allclose(ratio_down, down / nominal_contents)
+    assert [ratio.GetPointY(i) for i in range(3)] == [1., 1., 1.]
+    assert [band.GetPointX(i) for i in range(3)] == [0.5, 1.5, 2.5]
+
+def test_syst_band_envelope_symmetric():
+    nominal = _hist('h_nom_env', nominal_contents)
+    down, up = _yerrors(du.get_syst_band(nominal, variations, method='envelope', symmetric=True)[0])
+    np.testing.assert_allclose(up, [2., 2., 3.])
+    np.testing.assert_allclose(down, up)
+
+def test_syst_band_correlated_groups_sum_linearly():
+    nominal = _hist('h_nom_group', nominal_contents)
+    # group of variations 0 and 3: [1, 0, 3] + [2, 0, 0] = [3, 0, 3]
+    down, up = _yerrors(du.get_syst_band(nominal, variations, groups=[[0, 3]])[0])
+    np.testing.assert_allclose(up  , [3., 1., 3.])
+    np.testing.assert_allclose(down, [1., 2., 2.])
+
+def test_syst_band_groups_by_name_and_stat():
+    nominal = _hist('h_nom_names', nominal_contents, errors=[1., 1., 1.])
+    hists   = {f'v{i}': _hist(f'h_var{i}', contents) for i, contents in enumerate(variations)}
+    down, up = _yerrors(du.get_syst_band(nominal, hists, groups={'g': ['v0', 'v3']}, stat=True)[0])
+    np.testing.assert_allclose(up  , np.hypot([3., 1., 3.], 1.))
+    np.testing.assert_allclose(down, np.hypot([1., 2., 2.], 1.))
+
+def test_syst_band_sources_take_largest_shift():
+    nominal = _hist('h_nom_sources', nominal_contents)
+    # up/down pair 0, 3 both move up in the first bin: max(1, 2) = 2 instead of hypot(1, 2)
+    down, up = _yerrors(du.get_syst_band(nominal, variations, sources=[(0, 3)])[0])
+    np.testing.assert_allclose(up  , [2., 1., 3.])
+    np.testing.assert_allclose(down, [1., 2., 2.])
+
+def test_syst_band_sources_with_array_groups():
+    nominal = _hist('h_nom_sources_groups', nominal_contents)
+    # group of variations 1 and 2: [-1, 1, -2] + [0, -2, 0] = [-1, -1, -2]
+    down, up = _yerrors(du.get_syst_band(nominal, variations, groups=np.array([[1, 2]]),
+                                         sources={'s': (0, 3)})[0])
+    np.testing.assert_allclose(up  , [2., 0., 3.])
+    np.testing.assert_allclose(down, [1., 1., 2.])
+
+def test_syst_band_invalid_input():
+    nominal = _hist('h_nom_bad', nominal_contents)
+    with pytest.raises(ValueError):
+        du.get_syst_band(nominal, variations, groups=[['v0']])
+    with pytest.raises(ValueError):
+        du.get_syst_band(nominal, variations, groups=[[0], [0, 1]])
+    with pytest.raises(ValueError):
+        du.get_syst_band(nominal, variations, groups=[[0, 1]], sources=[(1, 2)])
+    with pytest.raises(ValueError):
+        du.get_syst_band(nominal, variations, sources=[(0, 1, 2)])
+    with pytest.raises(TypeError):
+        du.get_syst_band(nominal, variations, groups=[[0.5]])
+    with pytest.raises(TypeError):
+        du.get_syst_band(nominal, variations, groups=[[True, 1]])
+    with pytest.raises(ValueError):
+        du.get_syst_band(nominal, variations[:, :2])
+    with pytest.raises(ValueError):
+        du.get_syst_band(nominal, [_hist('h_var_binning', [1., 2., 3.], edges=(0., 1., 2., 4.))])
+    with pytest.raises(ValueError):
+        du.get_syst_band(nominal, variations, method='max')